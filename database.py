@@ -1,11 +1,12 @@
 """
 Database Helper Functions
 
-MongoDB helper functions ready to use in your backend code.
+Async MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
@@ -22,12 +23,15 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(database_url)
     db = _client[database_name]
 
+# Fire-and-forget collections skip the journal fsync wait on each insert
+RELAXED_WRITE_COLLECTIONS = {"contactmessage", "auditlog"}
+
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
-    """Insert a single document with timestamp"""
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
+    """Insert a single document with timestamp and return it with _id set"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
 
@@ -40,16 +44,40 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
-    return str(result.inserted_id)
+    col = db[collection_name]
+    if collection_name in RELAXED_WRITE_COLLECTIONS:
+        col = db.get_collection(collection_name, write_concern=WriteConcern(w=1, j=False))
+
+    # insert_one sets _id on the passed dict, so no read-back is needed
+    await col.insert_one(data_dict)
+    return data_dict
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None,
+                        sort: list = None, projection: dict = None, rename_id: bool = False):
+    """Get documents from collection
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+    With rename_id=True the _id -> id string rename happens server-side via
+    an aggregation, so callers can return the documents without touching them.
+    """
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
-    
-    cursor = db[collection_name].find(filter_dict or {})
+
+    if rename_id:
+        pipeline = [{"$match": filter_dict or {}}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        if limit:
+            pipeline.append({"$limit": limit})
+        if projection:
+            pipeline.append({"$project": projection})
+        pipeline.append({"$set": {"id": {"$toString": "$_id"}}})
+        pipeline.append({"$unset": "_id"})
+        return await db[collection_name].aggregate(pipeline).to_list(limit)
+
+    cursor = db[collection_name].find(filter_dict or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+
+    return await cursor.to_list(length=limit)
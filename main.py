@@ -1,15 +1,44 @@
+import asyncio
+import hmac
+import logging
 import os
-from typing import List, Optional, Literal, Any, Dict
-from fastapi import FastAPI, HTTPException, Body
+import time
+from typing import List, Optional, Any, Dict
+import orjson
+from fastapi import FastAPI, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr
+from cachetools import TTLCache
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
 from hashlib import sha256
+from passlib.hash import bcrypt
 from datetime import datetime
 
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from redis import asyncio as aioredis
+
 from database import db, create_document, get_documents
+from schemas import (ComplaintBase, ComplaintCategory, ComplaintStatus,
+                     ContactMessage, Faq, News, Priority, UserBase)
+
+class MongoORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that stringifies BSON types (ObjectId) via default=str."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str)
+
 
-app = FastAPI(title="Credit Card Complaint Portal API")
+app = FastAPI(title="Credit Card Complaint Portal API", default_response_class=MongoORJSONResponse)
+
+# Long text fields (description, content) compress 5-10x on the wire
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,8 +48,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
 # Utils
 
+# The event loop only holds weak references to tasks, so fire-and-forget
+# writes need a strong reference until they finish; the done-callback also
+# surfaces insert failures that happen after the response was sent
+_background_tasks: set = set()
+
+
+def _on_background_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task failed", exc_info=task.exception())
+
+
+def spawn_background(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_done)
+    return task
+
+
 def oid_str(o: Any) -> str:
     try:
         return str(o)
@@ -34,19 +84,84 @@ def serialize_doc(doc: Dict) -> Dict:
     d = {**doc}
     if "_id" in d:
         d["id"] = str(d.pop("_id"))
-    # convert datetimes
-    for k, v in list(d.items()):
-        if isinstance(v, datetime):
-            d[k] = v.isoformat()
+    # datetimes are serialized natively by orjson
     return d
 
 
-# Schemas for requests
-class RegisterRequest(BaseModel):
-    name: str
-    email: EmailStr
+def facet_count(facets: List[Dict], name: str) -> int:
+    # $count sub-pipelines yield [] when nothing matches
+    bucket = facets[0].get(name) if facets else None
+    return bucket[0]["n"] if bucket else 0
+
+
+@app.on_event("startup")
+async def snapshot_collections():
+    # /test reads this snapshot instead of paying an admin-command
+    # round-trip on every probe
+    app.state.started_at = time.time()
+    app.state.collections = []
+    app.state.db_error = None
+    if db is not None:
+        try:
+            app.state.collections = (await db.list_collection_names())[:10]
+        except Exception as e:
+            app.state.db_error = str(e)
+
+
+@app.on_event("startup")
+async def init_cache():
+    # Redis shares the cache across workers; fall back to per-process memory
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        FastAPICache.init(RedisBackend(aioredis.from_url(redis_url)), prefix="ccp")
+    else:
+        FastAPICache.init(InMemoryBackend(), prefix="ccp")
+
+
+@app.on_event("startup")
+async def create_indexes():
+    if db is None:
+        return
+    await asyncio.gather(
+        db.complaint.create_index("status"),
+        db.complaint.create_index("user_id"),
+        db.complaint.create_index("assigned_to"),
+        # Compound indexes matching list_complaints filters, newest-first
+        db.complaint.create_index([("user_id", 1), ("status", 1), ("_id", -1)]),
+        db.complaint.create_index([("assigned_to", 1), ("status", 1), ("_id", -1)]),
+        db.complaint.create_index([("status", 1), ("_id", -1)]),
+        db.user.create_index("email", unique=True),
+        db.complaint.create_index("sla_due_at"),
+        db.faq.create_index("is_active"),
+        db.news.create_index("is_published"),
+        db.news.create_index([("published_at", -1)]),
+    )
+
+
+# Registered after create_indexes so the complaint collection already
+# exists (create_index creates it implicitly) when collMod runs
+@app.on_event("startup")
+async def apply_validators():
+    # Mirror the schema enums as a $jsonSchema validator so out-of-band
+    # writes are rejected at the DB without another Python round-trip
+    if db is None:
+        return
+    validator = {"$jsonSchema": {"bsonType": "object", "properties": {
+        "status": {"enum": [s.value for s in ComplaintStatus]},
+        "category": {"enum": [c.value for c in ComplaintCategory]},
+        "priority": {"enum": [p.value for p in Priority]},
+    }}}
+    try:
+        await db.command("collMod", "complaint", validator=validator, validationLevel="moderate")
+    except OperationFailure as e:
+        if e.code != 26:  # NamespaceNotFound; anything else is a real error
+            raise
+
+
+# Schemas for requests; create models inherit the collection schemas so
+# validation is declared once and FastAPI runs it
+class RegisterRequest(UserBase):
     password: str
-    role: Literal["user", "operator", "admin"] = "user"
 
 
 class LoginRequest(BaseModel):
@@ -54,48 +169,29 @@ class LoginRequest(BaseModel):
     password: str
 
 
-class ComplaintCreate(BaseModel):
-    user_id: str
-    title: str
-    category: Literal["limit", "tagihan", "kartu_hilang", "penipuan", "biaya", "lainnya"] = "lainnya"
-    description: str
-    attachments: List[str] = []
-    priority: Literal["rendah", "sedang", "tinggi"] = "sedang"
+class ComplaintCreate(ComplaintBase):
+    pass
 
 
 class ComplaintUpdate(BaseModel):
-    status: Optional[Literal["baru", "diproses", "selesai", "ditolak"]] = None
+    status: Optional[ComplaintStatus] = None
     assigned_to: Optional[str] = None
     note: Optional[str] = None
 
 
-class FaqCreate(BaseModel):
-    question: str
-    answer: str
-    is_active: bool = True
-
-
-class NewsCreate(BaseModel):
-    title: str
-    content: str
-    cover_image: Optional[str] = None
-    is_published: bool = False
-
-
-class ContactMessageCreate(BaseModel):
-    name: str
-    email: EmailStr
-    subject: str
-    message: str
-
-
 @app.get("/")
-def root():
+async def root():
     return {"name": "Credit Card Complaint Portal API", "status": "ok"}
 
 
+@app.get("/healthz")
+async def healthz():
+    # Liveness probe: no DB touch, just proof the event loop is alive
+    return {"ok": True}
+
+
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -110,11 +206,11 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = getattr(db, 'name', None) or "unknown"
             response["connection_status"] = "Connected"
-            try:
-                response["collections"] = db.list_collection_names()[:10]
+            if app.state.db_error is None:
+                response["collections"] = app.state.collections
                 response["database"] = "✅ Connected & Working"
-            except Exception as e:
-                response["database"] = f"⚠️ Connected but Error: {str(e)[:80]}"
+            else:
+                response["database"] = f"⚠️ Connected but Error: {app.state.db_error[:80]}"
         else:
             response["database"] = "⚠️ Available but not initialized"
     except Exception as e:
@@ -123,34 +219,49 @@ def test_database():
 
 
 # -------------------- AUTH (Simple) --------------------
+# Absorbs repeated identical failed login attempts (credential stuffing)
+# without paying the hash verify + Mongo lookup again; per-process only
+_failed_logins = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _reject_login(attempt_key):
+    _failed_logins[attempt_key] = True
+    raise HTTPException(status_code=401, detail="Email atau password salah")
+
+
 @app.post("/api/register")
-def register(req: RegisterRequest):
+async def register(req: RegisterRequest):
     # Check existing
-    existing = db.user.find_one({"email": req.email})
+    existing = await db.user.find_one({"email": req.email})
     if existing:
         raise HTTPException(status_code=400, detail="Email sudah terdaftar")
-    password_hash = sha256(req.password.encode()).hexdigest()
-    user_data = {
-        "name": req.name,
-        "email": req.email,
-        "password_hash": password_hash,
-        "role": req.role,
-        "avatar_url": None,
-        "is_active": True,
-    }
-    new_id = create_document("user", user_data)
-    user = db.user.find_one({"_id": ObjectId(new_id)})
+    # bcrypt is ~100ms of CPU, so run it off the event loop
+    password_hash = await asyncio.to_thread(bcrypt.using(rounds=12).hash, req.password)
+    user_data = req.model_dump(exclude={"password"})
+    user_data["password_hash"] = password_hash
+    user = await create_document("user", user_data)
+    user.pop("password_hash", None)
     return serialize_doc(user)
 
 
 @app.post("/api/login")
-def login(req: LoginRequest):
-    user = db.user.find_one({"email": req.email})
-    if not user:
-        raise HTTPException(status_code=401, detail="Email atau password salah")
-    password_hash = sha256(req.password.encode()).hexdigest()
-    if user.get("password_hash") != password_hash:
+async def login(req: LoginRequest):
+    attempt_key = (req.email, sha256(req.password.encode()).hexdigest())
+    if attempt_key in _failed_logins:
         raise HTTPException(status_code=401, detail="Email atau password salah")
+    user = await db.user.find_one({"email": req.email})
+    if not user:
+        _reject_login(attempt_key)
+    stored_hash = user.get("password_hash", "")
+    if bcrypt.identify(stored_hash):
+        if not await asyncio.to_thread(bcrypt.verify, req.password, stored_hash):
+            _reject_login(attempt_key)
+    else:
+        # Legacy unsalted SHA-256 hash; verify and upgrade to bcrypt in place
+        if not hmac.compare_digest(stored_hash, sha256(req.password.encode()).hexdigest()):
+            _reject_login(attempt_key)
+        new_hash = await asyncio.to_thread(bcrypt.using(rounds=12).hash, req.password)
+        await db.user.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
     # Simple sessionless login: return user profile (no JWT for demo)
     u = serialize_doc(user)
     u.pop("password_hash", None)
@@ -159,33 +270,40 @@ def login(req: LoginRequest):
 
 # -------------------- COMPLAINTS --------------------
 @app.post("/api/complaints")
-def create_complaint(req: ComplaintCreate):
+async def create_complaint(req: ComplaintCreate):
     # Validate user exists
     try:
         uid = ObjectId(req.user_id)
     except Exception:
         raise HTTPException(400, detail="user_id tidak valid")
-    if not db.user.find_one({"_id": uid}):
+    # Pure index hit: no document fetch just to check existence
+    if await db.user.count_documents({"_id": uid}, limit=1) == 0:
         raise HTTPException(404, detail="User tidak ditemukan")
-    data = {
-        "user_id": req.user_id,
-        "title": req.title,
-        "category": req.category,
-        "description": req.description,
-        "attachments": req.attachments,
-        "status": "baru",
-        "assigned_to": None,
-        "priority": req.priority,
-        "sla_due_at": None,
-        "notes": [],
-    }
-    new_id = create_document("complaint", data)
-    doc = db.complaint.find_one({"_id": ObjectId(new_id)})
+    data = req.model_dump()
+    data.update({"status": "baru", "assigned_to": None, "sla_due_at": None, "notes": []})
+    doc = await create_document("complaint", data)
     return serialize_doc(doc)
 
 
 @app.get("/api/complaints")
-def list_complaints(status: Optional[str] = None, user_id: Optional[str] = None, assigned_to: Optional[str] = None, limit: int = 100):
+async def list_complaints(status: Optional[str] = None, user_id: Optional[str] = None, assigned_to: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    q: Dict[str, Any] = {}
+    if status:
+        q["status"] = status
+    if user_id:
+        q["user_id"] = user_id
+    if assigned_to:
+        q["assigned_to"] = assigned_to
+    return await get_documents(
+        "complaint", q, limit,
+        sort=[("_id", -1)],
+        projection={"description": 0, "attachments": 0, "notes": 0},
+        rename_id=True,
+    )
+
+
+@app.get("/api/complaints/stream")
+async def stream_complaints(status: Optional[str] = None, user_id: Optional[str] = None, assigned_to: Optional[str] = None, limit: int = Query(1000, ge=1, le=10000)):
     q: Dict[str, Any] = {}
     if status:
         q["status"] = status
@@ -193,12 +311,19 @@ def list_complaints(status: Optional[str] = None, user_id: Optional[str] = None,
         q["user_id"] = user_id
     if assigned_to:
         q["assigned_to"] = assigned_to
-    docs = get_documents("complaint", q, limit)
-    return [serialize_doc(d) for d in docs]
+    cursor = db.complaint.find(q).sort([("_id", -1)]).limit(limit)
+
+    # One line per document: the first byte leaves after the first Mongo
+    # batch and the full result set is never held in memory
+    async def gen():
+        async for d in cursor:
+            yield orjson.dumps(serialize_doc(d), default=str) + b"\n"
+
+    return StreamingResponse(gen(), media_type="application/x-ndjson")
 
 
 @app.patch("/api/complaints/{complaint_id}")
-def update_complaint(complaint_id: str, req: ComplaintUpdate):
+async def update_complaint(complaint_id: str, req: ComplaintUpdate):
     try:
         cid = ObjectId(complaint_id)
     except Exception:
@@ -208,11 +333,17 @@ def update_complaint(complaint_id: str, req: ComplaintUpdate):
         updates["status"] = req.status
     if req.assigned_to is not None:
         updates["assigned_to"] = req.assigned_to
-    if req.note:
-        db.complaint.update_one({"_id": cid}, {"$push": {"notes": {"text": req.note, "at": datetime.utcnow().isoformat()}}})
+    # Combine $set and $push into a single write and read the result back
+    # in the same round-trip
+    ops: Dict[str, Any] = {}
     if updates:
-        db.complaint.update_one({"_id": cid}, {"$set": updates})
-    doc = db.complaint.find_one({"_id": cid})
+        ops["$set"] = updates
+    if req.note:
+        ops["$push"] = {"notes": {"text": req.note, "at": datetime.utcnow()}}
+    if ops:
+        doc = await db.complaint.find_one_and_update({"_id": cid}, ops, return_document=ReturnDocument.AFTER)
+    else:
+        doc = await db.complaint.find_one({"_id": cid})
     if not doc:
         raise HTTPException(404, detail="Pengaduan tidak ditemukan")
     return serialize_doc(doc)
@@ -220,59 +351,76 @@ def update_complaint(complaint_id: str, req: ComplaintUpdate):
 
 # -------------------- FAQ --------------------
 @app.get("/api/faqs")
-def get_faqs(only_active: bool = True):
+@cache(expire=300)
+async def get_faqs(only_active: bool = True):
     q = {"is_active": True} if only_active else {}
-    docs = get_documents("faq", q, None)
-    return [serialize_doc(d) for d in docs]
+    return await get_documents("faq", q, None, rename_id=True)
 
 
 @app.post("/api/faqs")
-def create_faq(req: FaqCreate):
-    new_id = create_document("faq", req.model_dump())
-    doc = db.faq.find_one({"_id": ObjectId(new_id)})
+async def create_faq(req: Faq):
+    doc = await create_document("faq", req.model_dump())
+    await FastAPICache.clear()
     return serialize_doc(doc)
 
 
 # -------------------- NEWS --------------------
 @app.get("/api/news")
-def get_news(only_published: bool = True, limit: int = 50):
+@cache(expire=60)
+async def get_news(only_published: bool = True, limit: int = Query(50, ge=1, le=1000)):
     q = {"is_published": True} if only_published else {}
-    docs = get_documents("news", q, limit)
-    return [serialize_doc(d) for d in docs]
+    return await get_documents("news", q, limit, rename_id=True)
 
 
 @app.post("/api/news")
-def create_news(req: NewsCreate):
+async def create_news(req: News):
     data = req.model_dump()
-    if data.get("is_published") and "published_at" not in data:
-        data["published_at"] = datetime.utcnow().isoformat()
-    new_id = create_document("news", data)
-    doc = db.news.find_one({"_id": ObjectId(new_id)})
+    if data.get("is_published") and not data.get("published_at"):
+        data["published_at"] = datetime.utcnow()
+    doc = await create_document("news", data)
+    await FastAPICache.clear()
     return serialize_doc(doc)
 
 
 # -------------------- CONTACT --------------------
-@app.post("/api/contact")
-def create_contact(req: ContactMessageCreate):
-    new_id = create_document("contactmessage", req.model_dump())
-    doc = db.contactmessage.find_one({"_id": ObjectId(new_id)})
-    return serialize_doc(doc)
+@app.post("/api/contact", status_code=202)
+async def create_contact(req: ContactMessage):
+    # Fire-and-forget: acknowledge immediately, write in the background
+    spawn_background(create_document("contactmessage", req.model_dump()))
+    return {"status": "accepted"}
 
 
 # -------------------- DASHBOARD SUMMARY --------------------
 @app.get("/api/dashboard/summary")
-def dashboard_summary():
-    total_users = db.user.count_documents({}) if db else 0
-    total_complaints = db.complaint.count_documents({}) if db else 0
-    open_complaints = db.complaint.count_documents({"status": {"$in": ["baru", "diproses"]}}) if db else 0
-    closed_complaints = db.complaint.count_documents({"status": "selesai"}) if db else 0
-    total_faqs = db.faq.count_documents({"is_active": True}) if db else 0
-    total_news = db.news.count_documents({"is_published": True}) if db else 0
+@cache(expire=30)
+async def dashboard_summary():
+    if db is None:
+        return {
+            "users": 0,
+            "complaints": 0,
+            "complaints_open": 0,
+            "complaints_closed": 0,
+            "faqs": 0,
+            "news": 0,
+        }
+    # One $facet aggregation covers all three complaint counts; the remaining
+    # counts run concurrently alongside it
+    complaint_pipeline = [{"$facet": {
+        "total": [{"$count": "n"}],
+        "open": [{"$match": {"status": {"$in": ["baru", "diproses"]}}}, {"$count": "n"}],
+        "closed": [{"$match": {"status": "selesai"}}, {"$count": "n"}],
+    }}]
+    complaint_facets, total_users, total_faqs, total_news = await asyncio.gather(
+        db.complaint.aggregate(complaint_pipeline).to_list(1),
+        db.user.count_documents({}),
+        db.faq.count_documents({"is_active": True}),
+        db.news.count_documents({"is_published": True}),
+    )
     return {
         "users": total_users,
-        "complaints": total_complaints,
-        "complaints_open": open_complaints,
-        "complaints_closed": closed_complaints,
+        "complaints": facet_count(complaint_facets, "total"),
+        "complaints_open": facet_count(complaint_facets, "open"),
+        "complaints_closed": facet_count(complaint_facets, "closed"),
         "faqs": total_faqs,
         "news": total_news,
     }
@@ -281,4 +429,8 @@ def dashboard_summary():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # The in-memory cache fallback is per-process, so only scale out when
+    # Redis provides a shared cache backend
+    default_workers = (os.cpu_count() or 1) * 2 + 1 if os.getenv("REDIS_URL") else 1
+    workers = int(os.getenv("WEB_CONCURRENCY", default_workers))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers)
@@ -6,32 +6,61 @@ Collection name = lowercase class name.
 """
 
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, Literal, List
+from typing import Optional, List
+from enum import Enum
 from datetime import datetime
 
+# Enumerations shared by request models and the Mongo-side validators;
+# Pydantic v2 compiles membership checks to frozenset lookups in Rust core
+class Role(str, Enum):
+    USER = "user"
+    OPERATOR = "operator"
+    ADMIN = "admin"
+
+class ComplaintCategory(str, Enum):
+    LIMIT = "limit"
+    TAGIHAN = "tagihan"
+    KARTU_HILANG = "kartu_hilang"
+    PENIPUAN = "penipuan"
+    BIAYA = "biaya"
+    LAINNYA = "lainnya"
+
+class ComplaintStatus(str, Enum):
+    BARU = "baru"
+    DIPROSES = "diproses"
+    SELESAI = "selesai"
+    DITOLAK = "ditolak"
+
+class Priority(str, Enum):
+    RENDAH = "rendah"
+    SEDANG = "sedang"
+    TINGGI = "tinggi"
+
 # User and Auth
-class User(BaseModel):
+class UserBase(BaseModel):
+    """Client-supplied user fields, shared with the register request model"""
     name: str = Field(..., description="Full name")
     email: EmailStr = Field(..., description="Email address")
-    password_hash: str = Field(..., description="BCrypt hash of the password")
-    role: Literal["user", "operator", "admin"] = Field("user", description="Access level")
+    role: Role = Field(Role.USER, description="Access level")
     avatar_url: Optional[str] = Field(None, description="Profile avatar URL")
     is_active: bool = Field(True, description="Whether the user is active")
 
+class User(UserBase):
+    password_hash: str = Field(..., description="BCrypt hash of the password")
+
 # Complaint (Pengaduan)
-class Complaint(BaseModel):
+class ComplaintBase(BaseModel):
+    """Client-supplied complaint fields, shared with the create request model"""
     user_id: str = Field(..., description="ID of the submitting user")
     title: str = Field(..., description="Complaint title")
-    category: Literal[
-        "limit", "tagihan", "kartu_hilang", "penipuan", "biaya", "lainnya"
-    ] = Field("lainnya", description="Complaint category")
+    category: ComplaintCategory = Field(ComplaintCategory.LAINNYA, description="Complaint category")
     description: str = Field(..., description="Detailed description of the complaint")
     attachments: List[str] = Field(default_factory=list, description="Attachment URLs")
-    status: Literal["baru", "diproses", "selesai", "ditolak"] = Field(
-        "baru", description="Complaint status workflow"
-    )
+    priority: Priority = Field(Priority.SEDANG)
+
+class Complaint(ComplaintBase):
+    status: ComplaintStatus = Field(ComplaintStatus.BARU, description="Complaint status workflow")
     assigned_to: Optional[str] = Field(None, description="Operator user ID handling the complaint")
-    priority: Literal["rendah", "sedang", "tinggi"] = Field("sedang")
     sla_due_at: Optional[datetime] = Field(None, description="SLA due time")
     notes: List[dict] = Field(default_factory=list, description="Operator/admin notes")
 
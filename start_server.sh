@@ -15,5 +15,15 @@ mkdir -p logs
 echo "Installing dependencies..."
 pip install -r requirements.txt
 echo "Starting FastAPI server..."
-nohup uvicorn main:app --host 0.0.0.0 --port 8000 --reload > logs/server.log 2>&1 
+# Without Redis each worker has a private response cache and invalidation
+# only reaches the worker that handled the write, so scale out only when
+# REDIS_URL provides a shared backend
+if [ -n "$REDIS_URL" ]; then
+  DEFAULT_WORKERS=$((2 * $(nproc) + 1))
+else
+  echo "REDIS_URL not set; using a single worker so the in-memory cache stays coherent"
+  DEFAULT_WORKERS=1
+fi
+WORKERS=${WEB_CONCURRENCY:-$DEFAULT_WORKERS}
+nohup uvicorn main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers "$WORKERS" > logs/server.log 2>&1 
 echo "Server started in background"